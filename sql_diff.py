@@ -6,15 +6,72 @@ Script pour comparer la structure de deux fichiers mysqldump.
 Affiche uniquement les différences de structure, pas les différences de données.
 """
 
+import io
 import sys
 import re
 import argparse
+import hashlib
+import mmap
 import os
-from typing import Dict, List, Set, Tuple, Optional
-from dataclasses import dataclass
+import pickle
+import stat
+import tempfile
+from typing import IO, Dict, FrozenSet, Iterator, List, Set, Tuple, Optional
+from dataclasses import dataclass, field
 
 
-@dataclass
+# Début et fin d'une définition de table dans un dump mysqldump, appliqués en
+# binaire sur le fichier projeté en mémoire. Le "\n" littéral en préfixe permet au
+# moteur de sauter rapidement d'une ligne à l'autre ; la fin n'est cherchée qu'avant
+# le CREATE TABLE suivant, une table dont la fin n'est pas reconnue est ignorée sans
+# absorber la suivante. Aucun motif ne déborde de sa ligne, donc pas de retour
+# arrière sur l'ensemble du fichier. MySQL 8 peut placer un commentaire versionné
+# avant ENGINE (ex. /*!50100 TABLESPACE `innodb_system` */). Les options peuvent
+# contenir un ";" (ex. COMMENT='x;y') : seul celui de fin de ligne est exclu. Il est
+# optionnel car les tables partitionnées reportent la clause PARTITION sur les
+# lignes suivantes.
+_RE_CREATE_TABLE = re.compile(rb"CREATE TABLE[ \t]+`([^`\n]+)`[ \t]+\([ \t\r]*$", re.MULTILINE)
+_RE_CREATE_TABLE_NEXT_LINE = re.compile(rb"\n" + _RE_CREATE_TABLE.pattern, re.MULTILINE)
+_RE_TABLE_END = re.compile(rb"^\)[ \t]*(?:/\*[^\n]*?\*/[ \t]*)*(ENGINE[^\n]*?);?[ \t\r]*$", re.MULTILINE)
+
+# Options de table
+_RE_CHARSET = re.compile(r"DEFAULT CHARSET=(\w+)")
+_RE_COLLATE = re.compile(r"COLLATE=(\w+)")
+
+# Attributs de colonne
+_RE_DEFAULT = re.compile(r"DEFAULT\s+([^,\s]+)")
+
+# Une définition du corps d'un CREATE TABLE : début de colonne, clé primaire, clé
+# unique, clé étrangère ou index. Une seule alternative est tentée par définition,
+# le moteur aiguillant sur le premier caractère. Une liste de colonnes peut contenir
+# des longueurs de préfixe, par exemple (`nom`(10),`prenom`) : un niveau de
+# parenthèses est accepté.
+_COLUMN_LIST = r"\((?P<{}>(?:[^()]|\([^()]*\))+)\)"
+_RE_ENTRY = re.compile(
+    r"(?P<column>`(?P<column_name>[^`]+)`\s+)"
+    r"|(?P<primary>PRIMARY KEY\s+" + _COLUMN_LIST.format("primary_columns") + r")"
+    r"|(?P<unique>UNIQUE KEY\s+`(?P<unique_name>[^`]+)`\s+" + _COLUMN_LIST.format("unique_columns") + r")"
+    r"|(?P<foreign>CONSTRAINT\s+`(?P<fk_name>[^`]+)`\s+FOREIGN KEY\s+" + _COLUMN_LIST.format("fk_columns")
+    + r"\s+REFERENCES\s+`(?P<ref_table>[^`]+)`\s+" + _COLUMN_LIST.format("ref_columns") + r")"
+    r"|(?P<index>KEY\s+`(?P<index_name>[^`]+)`\s+" + _COLUMN_LIST.format("index_columns") + r")"
+)
+
+# Noms entre backquotes d'une liste de colonnes
+_RE_BT_NAME = re.compile(r"`([^`]+)`")
+
+# Caractères significatifs pour le découpage du corps d'un CREATE TABLE
+_RE_DEFINITION_TOKEN = re.compile(r"[(),`'\"\\]")
+
+# Répertoire du cache des analyses, activé par SQL_DIFF_CACHE=1
+_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "sql_diff")
+
+# Version des objets mis en cache : empreinte du présent fichier, pour que toute
+# modification de Table ou de l'analyse invalide le cache sans intervention manuelle
+with open(__file__, 'rb') as _source:
+    _CACHE_FORMAT = hashlib.sha256(_source.read()).hexdigest()
+del _source
+
+@dataclass(frozen=True, slots=True)
 class Column:
     """Classe représentant une colonne de table SQL."""
     name: str
@@ -22,62 +79,252 @@ class Column:
     nullable: bool
     default: Optional[str]
     extra: str
-    
-    def __eq__(self, other):
-        if not isinstance(other, Column):
-            return False
-        return (self.name == other.name and
-                self.data_type == other.data_type and
-                self.nullable == other.nullable and
-                self.default == other.default and
-                self.extra == other.extra)
-    
-    def __hash__(self):
-        return hash((self.name, self.data_type, self.nullable, 
-                    str(self.default), self.extra))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Constraint:
     """Classe représentant une contrainte SQL."""
     name: str
     constraint_type: str  # PRIMARY KEY, FOREIGN KEY, UNIQUE, etc.
-    columns: List[str]
+    columns: Tuple[str, ...]
     referenced_table: Optional[str] = None
-    referenced_columns: Optional[List[str]] = None
-    
-    def __eq__(self, other):
-        if not isinstance(other, Constraint):
-            return False
-        return (self.name == other.name and
-                self.constraint_type == other.constraint_type and
-                self.columns == other.columns and
-                self.referenced_table == other.referenced_table and
-                self.referenced_columns == other.referenced_columns)
-    
-    def __hash__(self):
-        return hash((self.name, self.constraint_type, tuple(self.columns), 
-                    self.referenced_table, 
-                    tuple(self.referenced_columns) if self.referenced_columns else None))
+    referenced_columns: Optional[Tuple[str, ...]] = None
+
+
+# Représentation compacte des contraintes d'une table :
+# (type, colonnes) -> (nom, table référencée, colonnes référencées)
+ConstraintKey = Tuple[str, Tuple[str, ...]]
+ConstraintInfo = Tuple[str, Optional[str], Optional[Tuple[str, ...]]]
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class Table:
     """Classe représentant une table SQL avec ses colonnes et contraintes."""
     name: str
     columns: Dict[str, Column]
-    constraints: List[Constraint]
+    constraints: Dict[ConstraintKey, ConstraintInfo]
     charset: Optional[str] = None
     collation: Optional[str] = None
+    # Index calculés une seule fois à la construction pour la comparaison
+    column_keys: FrozenSet[str] = field(init=False)
+    constraint_keys: FrozenSet[ConstraintKey] = field(init=False)
+    
+    def __post_init__(self):
+        self.column_keys = frozenset(self.columns)
+        self.constraint_keys = frozenset(self.constraints)
     
     def __eq__(self, other):
         if not isinstance(other, Table):
             return False
         return (self.name == other.name and
                 self.columns == other.columns and
-                set(self.constraints) == set(other.constraints) and
+                self.constraints == other.constraints and
                 self.charset == other.charset and
                 self.collation == other.collation)
+    
+    def get_constraint(self, key: ConstraintKey) -> Constraint:
+        """Reconstruit l'objet Constraint correspondant à une clé (type, colonnes)."""
+        constraint_type, columns = key
+        name, referenced_table, referenced_columns = self.constraints[key]
+        return Constraint(name, constraint_type, columns, referenced_table, referenced_columns)
+
+
+def _build_primary_key(match: re.Match) -> Tuple[ConstraintKey, ConstraintInfo]:
+    """Construit la contrainte de clé primaire."""
+    pk_columns = tuple(_RE_BT_NAME.findall(match.group("primary_columns")))
+    return ("PRIMARY KEY", pk_columns), ("PRIMARY", None, None)
+
+
+def _build_unique_key(match: re.Match) -> Tuple[ConstraintKey, ConstraintInfo]:
+    """Construit une contrainte d'unicité."""
+    unique_columns = tuple(_RE_BT_NAME.findall(match.group("unique_columns")))
+    return ("UNIQUE", unique_columns), (match.group("unique_name"), None, None)
+
+
+def _build_foreign_key(match: re.Match) -> Tuple[ConstraintKey, ConstraintInfo]:
+    """Construit une contrainte de clé étrangère."""
+    fk_columns = tuple(_RE_BT_NAME.findall(match.group("fk_columns")))
+    ref_columns = tuple(_RE_BT_NAME.findall(match.group("ref_columns")))
+    return ("FOREIGN KEY", fk_columns), (match.group("fk_name"), match.group("ref_table"), ref_columns)
+
+
+def _build_index(match: re.Match) -> Tuple[ConstraintKey, ConstraintInfo]:
+    """Construit un index normal."""
+    idx_columns = tuple(_RE_BT_NAME.findall(match.group("index_columns")))
+    return ("INDEX", idx_columns), (match.group("index_name"), None, None)
+
+
+# Alternative de _RE_ENTRY reconnue -> constructeur de la contrainte.
+# Les lignes "FOREIGN KEY" sans nom de contrainte ne sont pas reconnues.
+_CONSTRAINT_BUILDERS = {
+    "primary": _build_primary_key,
+    "unique": _build_unique_key,
+    "foreign": _build_foreign_key,
+    "index": _build_index,
+}
+
+
+def _iter_table_chunks(buf) -> Iterator[Tuple[str, str, str]]:
+    """Itère sur les CREATE TABLE du dump : (nom, corps de la définition, options)."""
+    start_match = _RE_CREATE_TABLE.match(buf) or _RE_CREATE_TABLE_NEXT_LINE.search(buf)
+    while start_match is not None:
+        # La fin de la table est cherchée avant le CREATE TABLE suivant uniquement
+        next_match = _RE_CREATE_TABLE_NEXT_LINE.search(buf, start_match.end())
+        end_pos = next_match.start() if next_match is not None else len(buf)
+        end_match = _RE_TABLE_END.search(buf, start_match.end(), end_pos)
+        if end_match is not None:
+            yield (start_match.group(1).decode('utf-8'),
+                   buf[start_match.end():end_match.start()].decode('utf-8'),
+                   end_match.group(1).decode('utf-8'))
+        start_match = next_match
+
+
+def _iter_table_chunks_stream(f) -> Iterator[Tuple[str, str, str]]:
+    """
+    Itère sur les CREATE TABLE d'un flux binaire lu ligne par ligne, pour les entrées
+    qui ne peuvent pas être projetées en mémoire : seul le corps de la table courante
+    est conservé.
+    """
+    table_name = None
+    body_buf: List[bytes] = []
+    
+    for line in f:
+        if table_name is not None:
+            end_match = _RE_TABLE_END.match(line)
+            if end_match:
+                yield (table_name.decode('utf-8'),
+                       b"".join(body_buf).decode('utf-8'),
+                       end_match.group(1).decode('utf-8'))
+                table_name = None
+                body_buf.clear()
+                continue
+        
+        # Un CREATE TABLE avant la fin reconnue de la table courante abandonne celle-ci
+        start_match = _RE_CREATE_TABLE.match(line)
+        if start_match:
+            table_name = start_match.group(1)
+            body_buf.clear()
+        elif table_name is not None:
+            body_buf.append(line)
+
+
+def _split_definition(body: str) -> List[str]:
+    """
+    Découpe le corps d'un CREATE TABLE en définitions (colonnes, clés, contraintes).
+    
+    Seules les virgules de premier niveau, hors parenthèses et hors chaînes ou
+    identifiants entre guillemets, séparent deux définitions. Le parcours saute
+    directement d'un caractère significatif au suivant.
+    """
+    segments = []
+    start = 0
+    paren_depth = 0
+    quote = None
+    skip_to = 0
+    
+    for token in _RE_DEFINITION_TOKEN.finditer(body):
+        pos = token.start()
+        if pos < skip_to:
+            # Caractère échappé par un antislash
+            continue
+        char = token.group()
+        
+        if quote:
+            if char == quote:
+                quote = None
+            elif char == "\\" and quote != "`":
+                skip_to = pos + 2
+        elif char in "`'\"":
+            quote = char
+        elif char == "(":
+            paren_depth += 1
+        elif char == ")":
+            paren_depth -= 1
+        elif char == "," and paren_depth == 0:
+            segments.append(body[start:pos].strip())
+            start = pos + 1
+    
+    segments.append(body[start:].strip())
+    return [segment for segment in segments if segment]
+
+
+def _parse_table_body(table_name: str, table_definition: str, table_options: str) -> Table:
+    """Analyse le corps d'un CREATE TABLE et construit l'objet Table correspondant."""
+    # Extraire les colonnes et contraintes
+    columns = {}
+    constraints = {}
+    
+    # Extraire le jeu de caractères et la collation
+    charset = None
+    collation = None
+    charset_match = _RE_CHARSET.search(table_options)
+    if charset_match:
+        charset = sys.intern(charset_match.group(1))
+    
+    collation_match = _RE_COLLATE.search(table_options)
+    if collation_match:
+        collation = sys.intern(collation_match.group(1))
+    
+    # Analyser chaque définition
+    for line in _split_definition(table_definition):
+        # Une seule expression régulière reconnaît le genre de définition
+        entry = _RE_ENTRY.match(line)
+        if entry is None:
+            continue
+        
+        if entry.lastgroup != "column":
+            key, info = _CONSTRAINT_BUILDERS[entry.lastgroup](entry)
+            constraints[key] = info
+            continue
+        
+        # Sinon, c'est une définition de colonne
+        col_name = sys.intern(entry.group("column_name"))
+        
+        # Extraire le type de données complet
+        rest_of_line = line[entry.end():]
+        
+        # Gérer les types enum et set spécialement (préfixe court, sans copie de la ligne)
+        keyword = rest_of_line[:4].lower()
+        if keyword.startswith(('enum', 'set')):
+            # Un espace peut précéder la parenthèse : "set ('u','v')" est normalisé en
+            # "set('u','v')". La parenthèse fermante est la première rencontrée.
+            keyword_len = 4 if keyword == 'enum' else 3
+            values = rest_of_line[keyword_len:].lstrip()
+            open_pos = len(rest_of_line) - len(values)
+            close = rest_of_line.find(')', open_pos + 2) if values.startswith('(') else -1
+            if close != -1:
+                data_type = rest_of_line[:keyword_len] + rest_of_line[open_pos:close + 1]
+                attributes = rest_of_line[close + 1:].strip()
+            else:
+                # Fallback si on ne peut pas analyser correctement
+                data_type_parts = rest_of_line.split(None, 1)
+                data_type = data_type_parts[0]
+                attributes = data_type_parts[1] if len(data_type_parts) > 1 else ""
+        else:
+            # Pour les autres types de données
+            data_type_parts = rest_of_line.split(None, 1)
+            data_type = data_type_parts[0]
+            attributes = data_type_parts[1] if len(data_type_parts) > 1 else ""
+        
+        # Extraire les attributs de la colonne
+        nullable = "NOT NULL" not in attributes
+        default = None
+        default_match = _RE_DEFAULT.search(attributes)
+        if default_match:
+            default = sys.intern(default_match.group(1))
+        
+        extra = ""
+        if "AUTO_INCREMENT" in attributes:
+            extra = "AUTO_INCREMENT"
+        
+        # Les types se répètent d'une colonne à l'autre : une seule instance par valeur.
+        # extra et les types de contraintes sont des littéraux, déjà partagés.
+        data_type = sys.intern(data_type)
+        
+        columns[col_name] = Column(col_name, data_type, nullable, default, extra)
+    
+    # Créer l'objet Table
+    return Table(table_name, columns, constraints, charset, collation)
 
 
 class MySQLDumpParser:
@@ -86,158 +333,76 @@ class MySQLDumpParser:
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.tables: Dict[str, Table] = {}
+        if os.environ.get("SQL_DIFF_CACHE") == "1":
+            self._parse_cached()
+        else:
+            self.parse()
+    
+    def _parse_cached(self):
+        """
+        Analyse le fichier en réutilisant le résultat mis en cache sur disque,
+        tant que le dump n'a pas été modifié (même chemin, date et taille).
+        """
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(f"Le fichier {self.file_path} n'existe pas.")
+        
+        abs_path = os.path.abspath(self.file_path)
+        st = os.stat(abs_path)
+        if not stat.S_ISREG(st.st_mode):
+            # Un tube n'a ni date ni taille fiables : pas de cache
+            self.parse()
+            return
+        key = (_CACHE_FORMAT, abs_path, st.st_mtime_ns, st.st_size)
+        cache_path = os.path.join(_CACHE_DIR, hashlib.sha256(abs_path.encode('utf-8')).hexdigest() + ".pkl")
+        
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key, tables = pickle.load(f)
+            if cached_key == key:
+                self.tables = tables
+                return
+        except Exception:
+            # Cache absent, illisible ou d'un format antérieur : on analyse à nouveau
+            pass
+        
         self.parse()
+        
+        # Écriture atomique : un fichier temporaire renommé une fois complet
+        try:
+            os.makedirs(_CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=_CACHE_DIR, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump((key, self.tables), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            # Le cache n'est qu'une optimisation : son échec n'empêche pas la comparaison
+            pass
     
     def parse(self):
         """Analyse le fichier mysqldump et extrait les informations de structure."""
         if not os.path.exists(self.file_path):
             raise FileNotFoundError(f"Le fichier {self.file_path} n'existe pas.")
             
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Trouver toutes les définitions de tables
-        create_table_pattern = r"CREATE TABLE\s+`([^`]+)`\s+\(([\s\S]+?)\)\s*(ENGINE[\s\S]+?);(?=\n|$)"
-        table_matches = re.finditer(create_table_pattern, content)
-        
-        for match in table_matches:
-            table_name = match.group(1)
-            table_definition = match.group(2)
-            table_options = match.group(3)
-            
-            # Extraire les colonnes et contraintes
-            columns = {}
-            constraints = []
-            
-            # Extraire le jeu de caractères et la collation
-            charset = None
-            collation = None
-            charset_match = re.search(r"DEFAULT CHARSET=(\w+)", table_options)
-            if charset_match:
-                charset = charset_match.group(1)
-            
-            collation_match = re.search(r"COLLATE=(\w+)", table_options)
-            if collation_match:
-                collation = collation_match.group(1)
-            
-            # Diviser la définition de la table en lignes
-            lines = [line.strip() for line in table_definition.split(',\n')]
-            
-            # Nettoyer les lignes
-            cleaned_lines = []
-            current_line = ""
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Gérer les lignes qui peuvent être divisées incorrectement
-                if current_line:
-                    current_line += ", " + line
-                else:
-                    current_line = line
-                
-                # Vérifier si la ligne est complète
-                if self._is_line_complete(current_line):
-                    cleaned_lines.append(current_line)
-                    current_line = ""
-            
-            if current_line:  # Ajouter la dernière ligne si elle existe
-                cleaned_lines.append(current_line)
-            
-            # Analyser chaque ligne
-            for line in cleaned_lines:
-                line = line.strip()
-                
-                # Vérifier si c'est une définition de colonne
-                if not line.startswith(('PRIMARY KEY', 'UNIQUE KEY', 'KEY', 'CONSTRAINT', 'FOREIGN KEY')):
-                    column_match = re.match(r"`([^`]+)`\s+", line)
-                    if column_match:
-                        col_name = column_match.group(1)
-                        
-                        # Extraire le type de données complet
-                        rest_of_line = line[column_match.end():]
-                        
-                        # Gérer les types enum et set spécialement
-                        if rest_of_line.lower().startswith(('enum', 'set')):
-                            # Trouver la parenthèse fermante correspondante
-                            enum_match = re.match(r"(enum|set)\s*\(([^)]+)\)", rest_of_line, re.IGNORECASE)
-                            if enum_match:
-                                data_type = f"{enum_match.group(1)}({enum_match.group(2)})"
-                                attributes = rest_of_line[enum_match.end():].strip()
-                            else:
-                                # Fallback si on ne peut pas analyser correctement
-                                data_type_parts = rest_of_line.split(None, 1)
-                                data_type = data_type_parts[0]
-                                attributes = data_type_parts[1] if len(data_type_parts) > 1 else ""
-                        else:
-                            # Pour les autres types de données
-                            data_type_parts = rest_of_line.split(None, 1)
-                            data_type = data_type_parts[0]
-                            attributes = data_type_parts[1] if len(data_type_parts) > 1 else ""
-                        
-                        # Extraire les attributs de la colonne
-                        nullable = "NOT NULL" not in attributes
-                        default = None
-                        default_match = re.search(r"DEFAULT\s+([^,\s]+)", attributes)
-                        if default_match:
-                            default = default_match.group(1)
-                        
-                        extra = ""
-                        if "AUTO_INCREMENT" in attributes:
-                            extra = "AUTO_INCREMENT"
-                        
-                        columns[col_name] = Column(col_name, data_type, nullable, default, extra)
-                        continue
-                
-                # Vérifier si c'est une clé primaire
-                pk_match = re.match(r"PRIMARY KEY\s+\(([^)]+)\)", line)
-                if pk_match:
-                    pk_columns = [col.strip('` ') for col in pk_match.group(1).split(',')]
-                    constraints.append(Constraint("PRIMARY", "PRIMARY KEY", pk_columns))
-                    continue
-                
-                # Vérifier si c'est une clé unique
-                unique_match = re.match(r"UNIQUE KEY\s+`([^`]+)`\s+\(([^)]+)\)", line)
-                if unique_match:
-                    unique_name = unique_match.group(1)
-                    unique_columns = [col.strip('` ') for col in unique_match.group(2).split(',')]
-                    constraints.append(Constraint(unique_name, "UNIQUE", unique_columns))
-                    continue
-                
-                # Vérifier si c'est une clé étrangère
-                fk_match = re.match(r"CONSTRAINT\s+`([^`]+)`\s+FOREIGN KEY\s+\(([^)]+)\)\s+REFERENCES\s+`([^`]+)`\s+\(([^)]+)\)", line)
-                if fk_match:
-                    fk_name = fk_match.group(1)
-                    fk_columns = [col.strip('` ') for col in fk_match.group(2).split(',')]
-                    ref_table = fk_match.group(3)
-                    ref_columns = [col.strip('` ') for col in fk_match.group(4).split(',')]
-                    constraints.append(Constraint(fk_name, "FOREIGN KEY", fk_columns, ref_table, ref_columns))
-                    continue
-                
-                # Vérifier si c'est un index normal
-                idx_match = re.match(r"KEY\s+`([^`]+)`\s+\(([^)]+)\)", line)
-                if idx_match:
-                    idx_name = idx_match.group(1)
-                    idx_columns = [col.strip('` ') for col in idx_match.group(2).split(',')]
-                    constraints.append(Constraint(idx_name, "INDEX", idx_columns))
-                    continue
-            
-            # Créer l'objet Table et l'ajouter au dictionnaire
-            self.tables[table_name] = Table(table_name, columns, constraints, charset, collation)
+        # Un fichier ordinaire est projeté en mémoire plutôt que lu : seuls le nom, le corps
+        # et les options de chaque CREATE TABLE sont décodés, les données ne sont jamais
+        # copiées. Les tubes (ex. <(zcat dump.sql.gz)) ne peuvent pas être projetés et
+        # sont lus ligne par ligne.
+        with open(self.file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode):
+                self._add_tables(_iter_table_chunks_stream(f))
+            elif st.st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    self._add_tables(_iter_table_chunks(buf))
     
-    def _is_line_complete(self, line: str) -> bool:
-        """Vérifie si une ligne de définition est complète."""
-        # Cette méthode est simplifiée et pourrait nécessiter plus de logique
-        # pour gérer correctement tous les cas
-        if line.startswith('CONSTRAINT') and 'REFERENCES' in line and ')' in line.split('REFERENCES')[1]:
-            return True
-        if line.startswith(('PRIMARY KEY', 'UNIQUE KEY', 'KEY')) and line.endswith(')'):
-            return True
-        if '`' in line and not line.startswith(('PRIMARY KEY', 'UNIQUE KEY', 'KEY', 'CONSTRAINT', 'FOREIGN KEY')):
-            return True
-        return False
+    def _add_tables(self, table_chunks: Iterator[Tuple[str, str, str]]):
+        """Analyse chaque CREATE TABLE découpé et l'ajoute aux tables du dump."""
+        for table_name, table_definition, table_options in table_chunks:
+            self.tables[table_name] = _parse_table_body(table_name, table_definition, table_options)
 
 
 class SQLDiff:
@@ -247,116 +412,135 @@ class SQLDiff:
         self.parser1 = MySQLDumpParser(file1)
         self.parser2 = MySQLDumpParser(file2)
     
-    def compare(self) -> str:
-        """Compare les deux structures et retourne un rapport des différences."""
-        result = []
+    def compare(self, out: IO[str]) -> bool:
+        """
+        Compare les deux structures et écrit le rapport des différences dans out
+        au fur et à mesure. Retourne True si des différences ont été trouvées.
+        """
+        tables1 = self.parser1.tables
+        tables2 = self.parser2.tables
+        w = out.write
         
-        # Comparer les tables
-        tables1 = set(self.parser1.tables.keys())
-        tables2 = set(self.parser2.tables.keys())
+        # Un seul tri et un seul parcours de l'ensemble des noms, répartis entre les
+        # sections du rapport
+        missing_tables = []
+        extra_tables = []
+        common_tables = []
+        for name in sorted(tables1.keys() | tables2.keys()):
+            if name not in tables2:
+                missing_tables.append(name)
+            elif name not in tables1:
+                extra_tables.append(name)
+            else:
+                common_tables.append(name)
+        had_differences = False
         
         # Tables manquantes
-        missing_tables = tables1 - tables2
         if missing_tables:
-            result.append("Tables présentes dans le premier fichier mais absentes dans le second:")
-            for table in sorted(missing_tables):
-                result.append(f"  - {table}")
-            result.append("")
+            w("Tables présentes dans le premier fichier mais absentes dans le second:\n")
+            for table in missing_tables:
+                w(f"  - {table}\n")
+            had_differences = True
         
         # Tables supplémentaires
-        extra_tables = tables2 - tables1
         if extra_tables:
-            result.append("Tables présentes dans le second fichier mais absentes dans le premier:")
-            for table in sorted(extra_tables):
-                result.append(f"  - {table}")
-            result.append("")
+            if had_differences:
+                w("\n")
+            w("Tables présentes dans le second fichier mais absentes dans le premier:\n")
+            for table in extra_tables:
+                w(f"  - {table}\n")
+            had_differences = True
         
         # Comparer les tables communes
-        common_tables = tables1.intersection(tables2)
-        for table_name in sorted(common_tables):
-            table1 = self.parser1.tables[table_name]
-            table2 = self.parser2.tables[table_name]
+        for table_name in common_tables:
+            table1 = tables1[table_name]
+            table2 = tables2[table_name]
             
-            table_diff = []
+            table_buf = io.StringIO()
+            tw = table_buf.write
             
             # Comparer les jeux de caractères
             if table1.charset != table2.charset:
-                table_diff.append(f"  Différence de jeu de caractères: {table1.charset} -> {table2.charset}")
+                tw(f"  Différence de jeu de caractères: {table1.charset} -> {table2.charset}\n")
             
             # Comparer les collations
             if table1.collation != table2.collation:
-                table_diff.append(f"  Différence de collation: {table1.collation} -> {table2.collation}")
+                tw(f"  Différence de collation: {table1.collation} -> {table2.collation}\n")
             
             # Comparer les colonnes
-            cols1 = set(table1.columns.keys())
-            cols2 = set(table2.columns.keys())
+            cols1 = table1.column_keys
+            cols2 = table2.column_keys
             
             # Colonnes manquantes
             missing_cols = cols1 - cols2
             if missing_cols:
-                table_diff.append("  Colonnes supprimées:")
+                tw("  Colonnes supprimées:\n")
                 for col in sorted(missing_cols):
-                    table_diff.append(f"    - {col}")
+                    tw(f"    - {col}\n")
             
             # Colonnes supplémentaires
             extra_cols = cols2 - cols1
             if extra_cols:
-                table_diff.append("  Colonnes ajoutées:")
+                tw("  Colonnes ajoutées:\n")
                 for col in sorted(extra_cols):
-                    table_diff.append(f"    + {col} {table2.columns[col].data_type}")
+                    tw(f"    + {col} {table2.columns[col].data_type}\n")
             
             # Comparer les colonnes communes
-            common_cols = cols1.intersection(cols2)
+            common_cols = cols1 & cols2
             for col_name in sorted(common_cols):
                 col1 = table1.columns[col_name]
                 col2 = table2.columns[col_name]
                 
-                if col1 != col2:
-                    table_diff.append(f"  Colonne modifiée: {col_name}")
-                    if col1.data_type != col2.data_type:
-                        table_diff.append(f"    Type: {col1.data_type} -> {col2.data_type}")
-                    if col1.nullable != col2.nullable:
-                        nullable1 = "NULL" if col1.nullable else "NOT NULL"
-                        nullable2 = "NULL" if col2.nullable else "NOT NULL"
-                        table_diff.append(f"    Nullable: {nullable1} -> {nullable2}")
-                    if col1.default != col2.default:
-                        table_diff.append(f"    Default: {col1.default} -> {col2.default}")
-                    if col1.extra != col2.extra:
-                        table_diff.append(f"    Extra: {col1.extra} -> {col2.extra}")
+                # Cas le plus fréquent : colonnes identiques, comparées d'un bloc
+                if col1 == col2:
+                    continue
+                
+                tw(f"  Colonne modifiée: {col_name}\n")
+                if col1.data_type != col2.data_type:
+                    tw(f"    Type: {col1.data_type} -> {col2.data_type}\n")
+                if col1.nullable != col2.nullable:
+                    nullable1 = "NULL" if col1.nullable else "NOT NULL"
+                    nullable2 = "NULL" if col2.nullable else "NOT NULL"
+                    tw(f"    Nullable: {nullable1} -> {nullable2}\n")
+                if col1.default != col2.default:
+                    tw(f"    Default: {col1.default} -> {col2.default}\n")
+                if col1.extra != col2.extra:
+                    tw(f"    Extra: {col1.extra} -> {col2.extra}\n")
             
             # Comparer les contraintes
-            constraints1 = {(c.constraint_type, tuple(c.columns)): c for c in table1.constraints}
-            constraints2 = {(c.constraint_type, tuple(c.columns)): c for c in table2.constraints}
-            
             # Contraintes manquantes
-            missing_constraints = set(constraints1.keys()) - set(constraints2.keys())
+            missing_constraints = table1.constraint_keys - table2.constraint_keys
             if missing_constraints:
-                table_diff.append("  Contraintes supprimées:")
-                for c_type, c_cols in sorted(missing_constraints):
-                    c = constraints1[(c_type, c_cols)]
+                tw("  Contraintes supprimées:\n")
+                for key in sorted(missing_constraints):
+                    c = table1.get_constraint(key)
                     if c.constraint_type == "FOREIGN KEY":
-                        table_diff.append(f"    - {c.constraint_type} {c.name} ({', '.join(c.columns)}) REFERENCES {c.referenced_table} ({', '.join(c.referenced_columns)})")
+                        tw(f"    - {c.constraint_type} {c.name} ({', '.join(c.columns)}) REFERENCES {c.referenced_table} ({', '.join(c.referenced_columns)})\n")
                     else:
-                        table_diff.append(f"    - {c.constraint_type} {c.name} ({', '.join(c.columns)})")
+                        tw(f"    - {c.constraint_type} {c.name} ({', '.join(c.columns)})\n")
             
             # Contraintes supplémentaires
-            extra_constraints = set(constraints2.keys()) - set(constraints1.keys())
+            extra_constraints = table2.constraint_keys - table1.constraint_keys
             if extra_constraints:
-                table_diff.append("  Contraintes ajoutées:")
-                for c_type, c_cols in sorted(extra_constraints):
-                    c = constraints2[(c_type, c_cols)]
+                tw("  Contraintes ajoutées:\n")
+                for key in sorted(extra_constraints):
+                    c = table2.get_constraint(key)
                     if c.constraint_type == "FOREIGN KEY":
-                        table_diff.append(f"    + {c.constraint_type} {c.name} ({', '.join(c.columns)}) REFERENCES {c.referenced_table} ({', '.join(c.referenced_columns)})")
+                        tw(f"    + {c.constraint_type} {c.name} ({', '.join(c.columns)}) REFERENCES {c.referenced_table} ({', '.join(c.referenced_columns)})\n")
                     else:
-                        table_diff.append(f"    + {c.constraint_type} {c.name} ({', '.join(c.columns)})")
+                        tw(f"    + {c.constraint_type} {c.name} ({', '.join(c.columns)})\n")
             
             # Ajouter les différences de cette table au résultat
-            if table_diff:
-                result.append(f"Différences pour la table `{table_name}`:")
-                result.extend(table_diff)
-                result.append("")
+            if table_buf.tell():
+                if had_differences:
+                    w("\n")
+                w(f"Différences pour la table `{table_name}`:\n")
+                w(table_buf.getvalue())
+                had_differences = True
         
-        return "\n".join(result) if result else "Aucune différence de structure trouvée."
+        if not had_differences:
+            w("Aucune différence de structure trouvée.\n")
+        return had_differences
 
 
 def main():
@@ -378,15 +562,13 @@ def main():
             print(f"Analyse du fichier {args.file2}...")
             print("Comparaison des structures...")
         
-        result = diff.compare()
-        
         if args.output:
             with open(args.output, 'w', encoding='utf-8') as f:
-                f.write(result)
+                diff.compare(f)
             if args.verbose:
                 print(f"Résultat écrit dans {args.output}")
         else:
-            print(result)
+            diff.compare(sys.stdout)
     except Exception as e:
         print(f"Erreur: {e}", file=sys.stderr)
         sys.exit(1)
@@ -9,28 +9,50 @@ Script pour traiter un fichier dump MySQL:
 """
 
 import argparse
+import mmap
+import os
 import re
+import stat
 import sys
+from contextlib import ExitStack
+
+
+# Nom de table entre backquotes, cherché par list_tables après le préfixe 'CREATE TABLE '
+_CREATE_TABLE_PREFIX = 'CREATE TABLE '
+_RE_CREATE_TABLE_LINE = re.compile(r'`([^`]+)`')
+
+# Motifs binaires utilisés par remove_tables_data, qui lit le dump sans le décoder
+_RE_CREATE_TABLE_BYTES = re.compile(rb'CREATE TABLE `([^`]+)`')
+_RE_INSERT_BYTES = re.compile(rb'INSERT INTO `([^`]+)`')
+
+# Début d'instruction en tête de ligne ; le "\n" littéral en préfixe permet au moteur
+# de sauter rapidement d'une ligne à l'autre, contrairement à "^" avec re.MULTILINE
+_RE_STATEMENT_BYTES = re.compile(rb'(INSERT INTO|CREATE TABLE) `([^`]+)`')
+_RE_STATEMENT_NEXT_LINE_BYTES = re.compile(rb'\n' + _RE_STATEMENT_BYTES.pattern)
+
+# Taille des blocs recopiés tels quels dans le dump de sortie
+_COPY_BLOCK_SIZE = 1024 * 1024
 
 
 def list_tables(input_stream, is_file=True):
     """Liste toutes les tables présentes dans le fichier dump ou depuis STDIN."""
     tables = []
-    create_table_pattern = re.compile(r'CREATE TABLE `([^`]+)`')
     
     try:
         if is_file:
             with open(input_stream, 'r', encoding='utf-8') as f:
                 for line in f:
-                    match = create_table_pattern.search(line)
-                    if match:
-                        tables.append(match.group(1))
+                    if line.startswith(_CREATE_TABLE_PREFIX):
+                        match = _RE_CREATE_TABLE_LINE.search(line, len(_CREATE_TABLE_PREFIX))
+                        if match:
+                            tables.append(match.group(1))
         else:
             # Lecture depuis STDIN
             for line in input_stream:
-                match = create_table_pattern.search(line)
-                if match:
-                    tables.append(match.group(1))
+                if line.startswith(_CREATE_TABLE_PREFIX):
+                    match = _RE_CREATE_TABLE_LINE.search(line, len(_CREATE_TABLE_PREFIX))
+                    if match:
+                        tables.append(match.group(1))
         
         if tables:
             source = input_stream if is_file else "STDIN"
@@ -49,6 +71,83 @@ def list_tables(input_stream, is_file=True):
         sys.exit(1)
 
 
+def _filter_stream(f_in, f_out, table_names_bytes, tables_found):
+    """Recopie le flux ligne par ligne en ignorant les INSERT des tables cibles."""
+    skipping = False
+    for line in f_in:
+        if skipping:
+            # Suite d'un INSERT ignoré réparti sur plusieurs lignes, jusqu'au ";" final
+            skipping = not line.rstrip(b'\r\n').endswith(b';')
+            continue
+        if line.startswith(b'INSERT INTO `'):
+            # Ignore les INSERT des tables cibles
+            match = _RE_INSERT_BYTES.match(line)
+            if match and match.group(1) in table_names_bytes:
+                skipping = not line.rstrip(b'\r\n').endswith(b';')
+                continue
+        elif line.startswith(b'CREATE TABLE `'):
+            # Vérifie si les tables existent dans le dump
+            match = _RE_CREATE_TABLE_BYTES.match(line)
+            if match and match.group(1) in table_names_bytes:
+                tables_found.add(match.group(1).decode('utf-8'))
+        
+        # Conserve toutes les autres lignes
+        f_out.write(line)
+
+
+def _statement_end(buf, start):
+    """Retourne la position qui suit la ligne terminant l'instruction commençant à start."""
+    pos = start
+    while True:
+        newline = buf.find(b'\n', pos)
+        if newline == -1:
+            return len(buf)
+        pos = newline + 1
+        if buf[max(start, newline - 2):newline].rstrip(b'\r').endswith(b';'):
+            return pos
+
+
+def _iter_statements(buf):
+    """Itère sur les lignes INSERT INTO / CREATE TABLE de buf : (début de ligne, mot-clé, table)."""
+    match = _RE_STATEMENT_BYTES.match(buf)
+    if match:
+        yield 0, match.group(1), match.group(2)
+    for match in _RE_STATEMENT_NEXT_LINE_BYTES.finditer(buf):
+        yield match.start() + 1, match.group(1), match.group(2)
+
+
+def _copy_range(buf, start, end, f_out):
+    """Recopie buf[start:end] dans f_out par blocs."""
+    for pos in range(start, end, _COPY_BLOCK_SIZE):
+        f_out.write(buf[pos:min(pos + _COPY_BLOCK_SIZE, end)])
+
+
+def _filter_file(f_in, f_out, table_names_bytes, tables_found):
+    """
+    Recopie un fichier dump en ignorant les INSERT des tables cibles.
+    
+    Le fichier est projeté en mémoire : seuls les débuts d'instructions INSERT et
+    CREATE TABLE sont recherchés, et les zones conservées entre deux INSERT ignorés
+    sont recopiées par blocs, sans boucle Python ligne par ligne.
+    """
+    if os.fstat(f_in.fileno()).st_size == 0:
+        return
+    
+    with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        passthrough_start = 0
+        for line_start, keyword, table_name in _iter_statements(buf):
+            if table_name not in table_names_bytes:
+                continue
+            if keyword == b'CREATE TABLE':
+                tables_found.add(table_name.decode('utf-8'))
+            elif line_start >= passthrough_start:
+                # Recopie la zone conservée puis saute l'instruction INSERT
+                _copy_range(buf, passthrough_start, line_start, f_out)
+                passthrough_start = _statement_end(buf, line_start)
+        
+        _copy_range(buf, passthrough_start, len(buf), f_out)
+
+
 def remove_tables_data(input_stream, table_names, output_stream=None, is_file_input=True, is_file_output=True):
     """
     Crée une version du dump où les données (INSERT) d'une ou plusieurs tables spécifiques sont supprimées,
@@ -61,44 +160,34 @@ def remove_tables_data(input_stream, table_names, output_stream=None, is_file_in
         is_file_input: True si input_stream est un chemin de fichier, False si c'est sys.stdin
         is_file_output: True si output_stream est un chemin de fichier, False si c'est sys.stdout
     """
-    output_lines = []
     tables_found = set()
-    insert_pattern = re.compile(r'INSERT INTO `([^`]+)`')
-    create_table_pattern = re.compile(r'CREATE TABLE `([^`]+)`')
+    table_names_bytes = {name.encode('utf-8') for name in table_names}
     
     try:
-        # Lecture du dump
-        if is_file_input:
-            with open(input_stream, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-        else:
-            # Lecture depuis STDIN
-            lines = input_stream.readlines()
-        
-        # Traitement des lignes
-        for line in lines:
-            # Vérifie si la ligne est une instruction INSERT pour une des tables cibles
-            match = insert_pattern.search(line)
-            if match and match.group(1) in table_names:
-                # Ignore cette ligne car c'est un INSERT pour une table cible
-                continue
+        # Le dump est traité en binaire et écrit au fil de la lecture : seules les lignes
+        # INSERT et CREATE TABLE sont examinées, les autres sont recopiées sans décodage
+        with ExitStack() as stack:
+            if is_file_input:
+                f_in = stack.enter_context(open(input_stream, 'rb'))
             else:
-                # Conserve toutes les autres lignes
-                output_lines.append(line)
+                # Lecture depuis STDIN
+                f_in = input_stream.buffer
             
-            # Vérifie si les tables existent dans le dump
-            match = create_table_pattern.search(line)
-            if match and match.group(1) in table_names:
-                tables_found.add(match.group(1))
+            if is_file_output and output_stream:
+                f_out = stack.enter_context(open(output_stream, 'wb'))
+            else:
+                # Écriture sur STDOUT
+                f_out = sys.stdout.buffer
+            
+            # Seul un fichier régulier peut être projeté en mémoire ; un tube
+            # (ex. <(zcat dump.sql.gz)) est lu comme STDIN
+            if is_file_input and stat.S_ISREG(os.fstat(f_in.fileno()).st_mode):
+                _filter_file(f_in, f_out, table_names_bytes, tables_found)
+            else:
+                _filter_stream(f_in, f_out, table_names_bytes, tables_found)
         
-        # Écriture du résultat
         if is_file_output and output_stream:
-            with open(output_stream, 'w', encoding='utf-8') as f:
-                f.writelines(output_lines)
             print(f"Le dump a été créé avec succès dans le fichier '{output_stream}'.")
-        else:
-            # Écriture sur STDOUT
-            sys.stdout.writelines(output_lines)
         
         # Affiche les tables qui n'ont pas été trouvées
         tables_not_found = set(table_names) - tables_found